@@ -0,0 +1,181 @@
+# autotune.py
+# Picks the back end, worker count and tile size with the best pixels per second
+# for a viewport, from short calibration renders on a downscaled copy of it.
+# Results are cached per machine and parameter class, so later runs skip calibration.
+# Tile size is tuned as a number of tiles per worker band and scaled to the full image.
+# The calibration image is small, so this captures how finely bands should be split
+# for streaming and load balance. It cannot capture effects that depend on the absolute
+# tile size, so the scaled tile is clamped to MIN_TILE_PIXELS..MAX_TILE_PIXELS.
+# A back end's fixed startup cost (Manager servers, process spawns) does not grow with
+# the image. It is timed on a tiny render and subtracted, so it does not penalise the
+# process back ends and high worker counts on the small calibration image.
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import tempfile
+import time
+import logging
+from tabulate import tabulate
+from backends import BACKENDS
+from fractals import FRACTALS, MANDELBROT, make_fractal
+from mandel_vectorized import GIL_DISABLED, MIN_TILE_PIXELS
+from output import encode_time
+
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'mandelseries', 'autotune.json')
+
+# Calibration renders keep the viewport and max_iter but shrink to about this many pixels
+CALIBRATION_PIXELS = 16384
+
+# Sequential ignores the worker count and philosophers serialize on their forks by design
+CANDIDATE_BACKENDS = ('mt', 'threaded_sync', 'threaded_barber', 'mp', 'process_sync', 'process_barber')
+
+# Back ends built on vectorized tiles, where tile size is a knob
+TILED_BACKENDS = ('mt', 'threaded_sync', 'threaded_barber')
+TILES_PER_BAND = (1, 2, 4, 8)
+
+# Upper bound for the scaled tile: the tile kernel peaks at about 115 bytes per pixel,
+# so this keeps a tile near 30 MB however large the image and its bands get
+MAX_TILE_PIXELS = 4 * max(MIN_TILE_PIXELS, CALIBRATION_PIXELS)
+
+# Each candidate is timed this many times and keeps its best run, to filter out scheduler noise
+CALIBRATION_REPEATS = 3
+
+# Size of the render that measures a back end's fixed startup cost
+STARTUP_SIZE = (4, 4)
+
+def machine_key():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()} cpus|{platform.python_implementation()} {platform.python_version()}{' nogil' if GIL_DISABLED else ''}"
+
+def parameter_class(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal):
+    # Runs in the same class share a fractal family (so a Julia sweep reuses one entry)
+    # and power-of-two buckets of size and depth; Multibrot powers cost differently per iteration
+    family = f"{fractal.name}^{fractal.power}" if hasattr(fractal, 'power') else fractal.name
+    return f"{family}|iter~2^{math.ceil(math.log2(max(max_iter, 1)))}|px~2^{round(math.log2(image_width * image_height))}"
+
+def worker_counts():
+    cpus = os.cpu_count() or 1
+    counts = {1, 2, cpus}
+    counts.update(2 ** k for k in range(1, int(math.log2(2 * cpus)) + 1))
+    return sorted(counts)
+
+def calibration_size(image_width, image_height, pixels=CALIBRATION_PIXELS):
+    factor = min(1.0, math.sqrt(pixels / (image_width * image_height)))
+    return max(16, round(image_width * factor)), max(16, round(image_height * factor))
+
+def band_tile_pixels(image_width, image_height, workers, tiles_per_band):
+    # Back ends give each worker image_height // workers rows; a tile is a whole number of rows
+    band_rows = max(1, image_height // workers)
+    return image_width * math.ceil(band_rows / tiles_per_band)
+
+def backend_options(config, image_width, image_height):
+    if config['backend'] not in TILED_BACKENDS:
+        return {}
+    tile_pixels = band_tile_pixels(image_width, image_height, config['workers'], config['tiles_per_band'])
+    return {'tile_pixels': min(MAX_TILE_PIXELS, max(MIN_TILE_PIXELS, tile_pixels))}
+
+def load_cache(cache_path=CACHE_PATH):
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache, cache_path=CACHE_PATH):
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+def time_render(backend, width, height, xcenter, ycenter, scale, max_iter, workers, fractal, tile_pixels, tmp):
+    # Best of CALIBRATION_REPEATS runs, in seconds. Encoding is the same for every
+    # candidate, so the back end's reported encode time is left out
+    filename = os.path.join(tmp, f'{backend}_{workers}_{tile_pixels}_{width}x{height}.png')
+    options = {'tile_pixels': tile_pixels} if backend in TILED_BACKENDS else {}
+    times = []
+    for _ in range(CALIBRATION_REPEATS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = BACKENDS[backend](filename, xcenter, ycenter, scale, width, height, max_iter, workers, fractal, **options)
+        times.append(time.perf_counter() - start - encode_time(summary))
+    return min(times)
+
+def calibrate(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal=MANDELBROT, backends=CANDIDATE_BACKENDS):
+    width, height = calibration_size(image_width, image_height)
+    counts = worker_counts()
+    trials = []
+    best_rate = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for workers in counts:
+                # Splits that round to the same number of rows would only time the same render again
+                tiles = {}
+                for tiles_per_band in (TILES_PER_BAND if backend in TILED_BACKENDS else (None,)):
+                    tile_pixels = tiles_per_band and band_tile_pixels(width, height, workers, tiles_per_band)
+                    tiles.setdefault(tile_pixels, tiles_per_band)
+                startup = time_render(backend, *STARTUP_SIZE, xcenter, ycenter, scale, max_iter, workers, fractal, None, tmp)
+                rates = []
+                for tile_pixels, tiles_per_band in tiles.items():
+                    elapsed = time_render(backend, width, height, xcenter, ycenter, scale, max_iter, workers, fractal, tile_pixels, tmp)
+                    rate = width * height / max(elapsed - startup, 1e-6)
+                    trials.append({'backend': backend, 'workers': workers, 'tiles_per_band': tiles_per_band, 'startup_seconds': startup, 'pixels_per_second': rate})
+                    rates.append(rate)
+                best_rate = max(best_rate, *rates)
+                if workers == 1 and max(rates) * counts[-1] < best_rate:
+                    # Even perfect scaling from one worker cannot catch the best so far
+                    break
+    return trials
+
+def autotune(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal=MANDELBROT, cache_path=CACHE_PATH, refresh=False):
+    # Returns (config, trials); trials is empty when the config came from the cache
+    cache = load_cache(cache_path)
+    machine = cache.setdefault(machine_key(), {})
+    key = parameter_class(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal)
+    # Entries calibrated before startup cost was subtracted carry no startup_seconds and are recalibrated
+    if key in machine and 'startup_seconds' in machine[key] and not refresh:
+        logging.info(f"Autotune cache hit for {key}")
+        return machine[key], []
+    logging.info(f"Calibrating {key}")
+    trials = calibrate(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal)
+    machine[key] = max(trials, key=lambda trial: trial['pixels_per_second'])
+    save_cache(cache, cache_path)
+    return machine[key], trials
+
+def render_autotuned(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, fractal=MANDELBROT, cache_path=CACHE_PATH, refresh=False):
+    config, trials = autotune(xcenter, ycenter, scale, image_width, image_height, max_iter, fractal, cache_path, refresh)
+    options = backend_options(config, image_width, image_height)
+    BACKENDS[config['backend']](filename, xcenter, ycenter, scale, image_width, image_height, max_iter, config['workers'], fractal, **options)
+    return config, trials
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Render with the back end, worker count and tile size tuned for this machine.')
+    parser.add_argument('-m', type=int, default=1000, help='Max iterations per point')
+    parser.add_argument('-x', type=float, default=0, help='X center')
+    parser.add_argument('-y', type=float, default=0, help='Y center')
+    parser.add_argument('-s', type=float, default=4, help='Scale')
+    parser.add_argument('-W', type=int, default=800, help='Image width')
+    parser.add_argument('-H', type=int, default=600, help='Image height')
+    parser.add_argument('-o', type=str, default='mandel_autotuned.png', help='Output file')
+    parser.add_argument('-f', '--fractal', choices=list(FRACTALS), default='mandelbrot', help='Fractal kernel')
+    parser.add_argument('-c', type=complex, default=None, help='Julia parameter, e.g. -c=-0.8+0.156j')
+    parser.add_argument('-p', type=int, default=None, help='Multibrot power')
+    parser.add_argument('--cache', type=str, default=CACHE_PATH, help='Autotune cache file')
+    parser.add_argument('--refresh', action='store_true', help='Recalibrate even if the cache has an entry')
+    args = parser.parse_args()
+    fractal = make_fractal(args.fractal, c=args.c, power=args.p)
+
+    start = time.time()
+    config, trials = render_autotuned(args.o, args.x, args.y, args.s, args.W, args.H, args.m, fractal, args.cache, args.refresh)
+    elapsed = time.time() - start
+    if trials:
+        rows = [{'Back end': t['backend'], 'Workers': t['workers'], 'Tiles/band': t['tiles_per_band'] or '-', 'Startup (ms)': f"{1000 * t['startup_seconds']:.1f}", 'Mpix/s': f"{t['pixels_per_second'] / 1e6:.3f}"} for t in trials]
+        print(tabulate(rows, headers='keys', tablefmt='grid'))
+    print(f"\nBest: {config['backend']} with {config['workers']} workers, {config['tiles_per_band'] or '-'} tiles per band ({config['pixels_per_second'] / 1e6:.3f} Mpix/s in calibration)")
+    logging.info(f"Rendered {args.o} in {elapsed:.2f} seconds (including calibration)")
+
+if __name__ == "__main__":
+    main()
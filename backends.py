@@ -0,0 +1,32 @@
+# backends.py
+# Every back end behind one signature:
+# (filename, xcenter, ycenter, scale, image_width, image_height, max_iter, n, fractal, **options)
+# where options are the back end's own keyword arguments (output, precision, tile_pixels, ...)
+
+from PIL import Image
+from fractals import MANDELBROT
+from output import DEFAULT_OUTPUT, encode_row, check_iterations_output
+from mandel import compute_image
+from mandelseries import multiprocessing_mandelbrot, multithreading_mandelbrot
+from mandelseries_sync import mandelbrot_threaded_sync, mandelbrot_process_sync
+from mandelseries_sleeping_barber import mandelbrot_sleeping_barber_sync, mandelbrot_process_sleeping_barber_sync
+from mandelseries_philosophers import mandelbrot_philosophers_sync
+
+def sequential_mandelbrot(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, n=1, fractal=MANDELBROT, output=DEFAULT_OUTPUT):
+    check_iterations_output(filename, False)
+    img = Image.new('RGB', (image_width, image_height))
+    summary = []
+    compute_image((img, xcenter - scale, xcenter + scale, ycenter - scale, ycenter + scale, max_iter, 0, image_height, summary, fractal))
+    encode_time = output.save(img, filename)
+    return summary + [encode_row('Fractal', encode_time)]
+
+BACKENDS = {
+    'sequential': sequential_mandelbrot,
+    'mp': multiprocessing_mandelbrot,
+    'mt': multithreading_mandelbrot,
+    'process_sync': lambda f, x, y, s, w, h, m, n, fractal=MANDELBROT, **options: mandelbrot_process_sync(x, y, s, w, h, m, n, f, fractal, **options),
+    'threaded_sync': lambda f, x, y, s, w, h, m, n, fractal=MANDELBROT, **options: mandelbrot_threaded_sync(x, y, s, w, h, m, n, f, fractal, **options),
+    'process_barber': lambda f, x, y, s, w, h, m, n, fractal=MANDELBROT, **options: mandelbrot_process_sleeping_barber_sync(x, y, s, w, h, m, n, f, fractal, **options),
+    'threaded_barber': lambda f, x, y, s, w, h, m, n, fractal=MANDELBROT, **options: mandelbrot_sleeping_barber_sync(x, y, s, w, h, m, n, f, fractal, **options),
+    'philosophers': lambda f, x, y, s, w, h, m, n, fractal=MANDELBROT, **options: mandelbrot_philosophers_sync(x, y, s, w, h, m, n, f, fractal, **options),
+}
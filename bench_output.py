@@ -0,0 +1,46 @@
+# bench_output.py
+# Encode time of each output format and PNG setting, next to the compute time of the same image
+
+import argparse
+import os
+import tempfile
+import time
+from PIL import Image
+from tabulate import tabulate
+from mandel_vectorized import iterations_for_rows, iteration_to_color_array
+from output import OutputStage
+
+CASES = [
+    ('png', 'Pillow, level 6', OutputStage(parallel_min_pixels=float('inf'))),
+    ('png', 'Pillow, level 1', OutputStage(compress_level=1, parallel_min_pixels=float('inf'))),
+    ('png', 'strips, level 6, sub', OutputStage(parallel_min_pixels=0)),
+    ('png', 'strips, level 1, sub', OutputStage(compress_level=1, parallel_min_pixels=0)),
+    ('png', 'strips, level 1, up', OutputStage(compress_level=1, png_filter='up', parallel_min_pixels=0)),
+    ('bmp', 'uncompressed', OutputStage()),
+    ('npy', 'iterations', OutputStage()),
+    ('webp', 'quality 90', OutputStage()),
+    ('jpg', 'quality 90', OutputStage()),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare output encoders against compute time.')
+    parser.add_argument('-m', type=int, default=256, help='Max iterations per point')
+    parser.add_argument('-W', type=int, default=1600, help='Image width')
+    parser.add_argument('-H', type=int, default=1200, help='Image height')
+    args = parser.parse_args()
+
+    start = time.time()
+    iterations = iterations_for_rows(0, args.H, -0.5, 0, 1.5, args.W, args.H, args.m)
+    img = Image.fromarray(iteration_to_color_array(iterations, args.m), 'RGB')
+    compute_time = time.time() - start
+
+    rows = [{'Stage': 'compute (vectorized, 1 thread)', 'Time (s)': f'{compute_time:.3f}', 'Size (KB)': ''}]
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext, label, stage in CASES:
+            filename = os.path.join(tmp, f'out.{ext}')
+            elapsed = stage.save(img, filename, iterations)
+            rows.append({'Stage': f'{ext}: {label}', 'Time (s)': f'{elapsed:.3f}', 'Size (KB)': os.path.getsize(filename) // 1024})
+    print(tabulate(rows, headers='keys', tablefmt='grid'))
+
+if __name__ == "__main__":
+    main()
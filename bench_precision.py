@@ -0,0 +1,57 @@
+# bench_precision.py
+# Throughput, memory and accuracy of float32 tiles against float64, with the automatic choice
+
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from tabulate import tabulate
+from mandel_vectorized import iterations_for_rows, select_dtype
+
+# (label, xcenter, ycenter, scale): from the full set down to where float32 runs out of bits
+VIEWPORTS = [
+    ('wide', 0.0, 0.0, 4.0),
+    ('full', -0.5, 0.0, 1.5),
+    ('seahorse', -0.745, 0.1, 0.01),
+    ('shallow zoom', -0.7436, 0.1318, 1e-3),
+    ('deep zoom', -0.743643, 0.131825, 1e-5),
+]
+
+def render(xcenter, ycenter, scale, image_width, image_height, max_iter, dtype):
+    tracemalloc.start()
+    start = time.perf_counter()
+    iters = iterations_for_rows(0, image_height, xcenter, ycenter, scale, image_width, image_height, max_iter, dtype=dtype)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return iters, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare float32 and float64 vectorized kernels.')
+    parser.add_argument('-m', type=int, default=32, help='Max iterations per point (auto keeps float32 on the wider views up to about 48)')
+    parser.add_argument('-W', type=int, default=600, help='Image width')
+    parser.add_argument('-H', type=int, default=400, help='Image height')
+    args = parser.parse_args()
+
+    pixels = args.W * args.H
+    rows = []
+    for label, xcenter, ycenter, scale in VIEWPORTS:
+        ref, t64, mem64 = render(xcenter, ycenter, scale, args.W, args.H, args.m, np.float64)
+        fast, t32, mem32 = render(xcenter, ycenter, scale, args.W, args.H, args.m, np.float32)
+        differing = ref != fast
+        auto = select_dtype(xcenter, ycenter, scale, args.W, args.H, args.m)
+        rows.append({
+            'Viewport': label,
+            'Auto': auto.name,
+            'f64 Mpix/s': f'{pixels / t64 / 1e6:.2f}',
+            'f32 Mpix/s': f'{pixels / t32 / 1e6:.2f}',
+            'f64 peak MB': f'{mem64 / 2**20:.1f}',
+            'f32 peak MB': f'{mem32 / 2**20:.1f}',
+            'f32 differing px': f'{differing.sum()} ({100 * differing.mean():.3f}%)',
+            'Max |d iter|': int(np.abs(ref.astype(np.int64) - fast)[differing].max()) if differing.any() else 0,
+            'Auto differing px': differing.sum() if auto == np.float32 else 0,
+        })
+    print(tabulate(rows, headers='keys', tablefmt='grid'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# bench_scaling.py
+# Worker-count scaling of the thread back ends (vectorized kernel) against the process back ends
+
+import argparse
+import os
+import tempfile
+import time
+import logging
+from tabulate import tabulate
+from backends import BACKENDS
+from output import encode_time
+from mandel_vectorized import GIL_DISABLED
+
+# Sequential ignores the worker count; philosophers serialize on their forks by design
+SCALING_BACKENDS = [name for name in BACKENDS if name not in ('sequential', 'philosophers')]
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description='Compare worker-count scaling of the Mandelbrot back ends.')
+    parser.add_argument('-m', type=int, default=256, help='Max iterations per point')
+    parser.add_argument('-x', type=float, default=-0.5, help='X center')
+    parser.add_argument('-y', type=float, default=0, help='Y center')
+    parser.add_argument('-s', type=float, default=1.5, help='Scale')
+    parser.add_argument('-W', type=int, default=400, help='Image width')
+    parser.add_argument('-H', type=int, default=300, help='Image height')
+    parser.add_argument('-n', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to try')
+    parser.add_argument('-b', nargs='+', default=SCALING_BACKENDS, choices=list(BACKENDS), help='Back ends to run')
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, GIL disabled: {GIL_DISABLED}")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.b:
+            baseline = None
+            for n in args.n:
+                filename = os.path.join(tmp, f'{name}_{n}.png')
+                start = time.time()
+                summary = BACKENDS[name](filename, args.x, args.y, args.s, args.W, args.H, args.m, n)
+                encode = encode_time(summary)
+                # Speedup compares compute only; encoding runs once on the finished image
+                elapsed = time.time() - start - encode
+                if baseline is None:
+                    baseline = elapsed
+                rows.append({'Back end': name, 'Workers': n, 'Time (s)': f'{elapsed:.3f}', 'Encode (s)': f'{encode:.3f}', 'Speedup': f'{baseline / elapsed:.2f}x'})
+    print(tabulate(rows, headers='keys', tablefmt='grid'))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# coloring.py
+# Histogram-equalized coloring.
+# Each worker counts the iterations of its own rows into a partial histogram;
+# the parent sums them (max_iter + 1 integers per worker), turns the total into a
+# palette lookup table and colors the whole iteration buffer in one indexing pass.
+
+import numpy as np
+
+COLORINGS = ('linear', 'histogram')
+
+def check_coloring(coloring):
+    if coloring not in COLORINGS:
+        raise ValueError(f"Unknown coloring '{coloring}', expected one of: {', '.join(COLORINGS)}")
+
+def iteration_histogram(iters, max_iter):
+    return np.bincount(np.asarray(iters, dtype=np.int64).ravel(), minlength=max_iter + 1)
+
+def merge_histograms(histograms, max_iter):
+    total = np.zeros(max_iter + 1, dtype=np.int64)
+    for histogram in histograms:
+        total += histogram
+    return total
+
+def histogram_levels(histogram, max_iter):
+    # Each escaped count moves to its share of escaped pixels at or below it, spread over
+    # 0..max_iter-1; max_iter (never escaped) keeps its own level
+    levels = np.arange(max_iter + 1, dtype=np.int64)
+    cdf = np.cumsum(histogram[:max_iter])
+    if max_iter and cdf[-1]:
+        levels[:max_iter] = (max_iter - 1) * cdf // cdf[-1]
+    return levels
+
+def histogram_palette(histogram, max_iter, color):
+    # color is the module's own vectorized iteration_to_color, so only the index mapping changes
+    return color(histogram_levels(histogram, max_iter), max_iter)
+
+def apply_palette(iters, palette):
+    return palette[iters]
+
+def histogram_image(iterations, histograms, max_iter, color):
+    palette = histogram_palette(merge_histograms(histograms, max_iter), max_iter, color)
+    return apply_palette(iterations, palette)
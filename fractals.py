@@ -0,0 +1,203 @@
+# fractals.py
+# Escape-time fractal kernels shared by every back end.
+# A kernel supplies its starting point, its iteration step and its bailout; the
+# scalar loop (process back ends) and the NumPy tile loop (thread back ends) are
+# written once here. Steps only use + - * and abs, so the same code runs on
+# Python floats and on NumPy arrays. The per-pixel loop pays for a method call
+# per iteration, so each built-in kernel also overrides iterations_at_point
+# with the step written inline.
+
+import numpy as np
+
+class EscapeTimeFractal:
+    name = 'escape-time'
+
+    def __init__(self, bailout=4.0):
+        # Squared escape radius
+        self.bailout = bailout
+
+    def start(self, x, y):
+        # Returns (zx, zy, cx, cy) for the pixel at (x, y)
+        return x, y, x, y
+
+    def step(self, x, y, x2, y2, cx, cy):
+        # x2 and y2 are x*x and y*y, already computed for the bailout test
+        raise NotImplementedError
+
+    def iterations_at_point(self, x, y, max_iter):
+        x, y, cx, cy = self.start(x, y)
+        i = 0
+        while i < max_iter:
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > self.bailout:
+                break
+            x, y = self.step(x, y, x2, y2, cx, cy)
+            i += 1
+        return i
+
+    def iterations_on_tile(self, px, py, max_iter):
+        shape = px.shape
+        x, y, cx, cy = self.start(px.ravel(), py.ravel())
+        x = x.copy()
+        y = y.copy()
+        # Constants such as the Julia parameter take the tile's dtype so float32 tiles stay float32
+        cx = np.broadcast_to(np.asarray(cx, dtype=x.dtype), x.shape)
+        cy = np.broadcast_to(np.asarray(cy, dtype=y.dtype), y.shape)
+        iters = np.full(x.size, max_iter, dtype=np.int32)
+        index = np.arange(x.size)
+        for i in range(max_iter):
+            x2 = x * x
+            y2 = y * y
+            alive = x2 + y2 <= self.bailout
+            if not alive.all():
+                # Record escaped points and drop them so later iterations only touch live ones
+                iters[index[~alive]] = i
+                index = index[alive]
+                if index.size == 0:
+                    break
+                x, y, x2, y2, cx, cy = x[alive], y[alive], x2[alive], y2[alive], cx[alive], cy[alive]
+            x, y = self.step(x, y, x2, y2, cx, cy)
+        return iters.reshape(shape)
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+class Mandelbrot(EscapeTimeFractal):
+    name = 'mandelbrot'
+
+    def step(self, x, y, x2, y2, cx, cy):
+        return x2 - y2 + cx, 2 * x * y + cy
+
+    def iterations_at_point(self, x, y, max_iter):
+        bailout = self.bailout
+        cx, cy = x, y
+        i = 0
+        while i < max_iter:
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > bailout:
+                break
+            x, y = x2 - y2 + cx, 2 * x * y + cy
+            i += 1
+        return i
+
+class Julia(EscapeTimeFractal):
+    name = 'julia'
+
+    def __init__(self, c=complex(-0.8, 0.156), bailout=4.0):
+        super().__init__(bailout)
+        self.c = complex(c)
+
+    def start(self, x, y):
+        # z starts at the pixel, c is the fixed parameter
+        return x, y, self.c.real, self.c.imag
+
+    def step(self, x, y, x2, y2, cx, cy):
+        return x2 - y2 + cx, 2 * x * y + cy
+
+    def iterations_at_point(self, x, y, max_iter):
+        bailout = self.bailout
+        cx, cy = self.c.real, self.c.imag
+        i = 0
+        while i < max_iter:
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > bailout:
+                break
+            x, y = x2 - y2 + cx, 2 * x * y + cy
+            i += 1
+        return i
+
+    def __repr__(self):
+        return f"Julia(c={self.c!r})"
+
+class Multibrot(EscapeTimeFractal):
+    name = 'multibrot'
+
+    def __init__(self, power=3, bailout=4.0):
+        super().__init__(bailout)
+        try:
+            integral = int(power) == power
+        except (TypeError, ValueError):
+            integral = False
+        if not integral or power < 2:
+            raise ValueError(f"Multibrot power must be an integer >= 2, got {power!r}")
+        self.power = int(power)
+
+    def step(self, x, y, x2, y2, cx, cy):
+        # z**power by repeated complex multiplication
+        zx, zy = x, y
+        for _ in range(self.power - 1):
+            zx, zy = zx * x - zy * y, zx * y + zy * x
+        return zx + cx, zy + cy
+
+    def iterations_at_point(self, x, y, max_iter):
+        # Same multiplication order as step, so process and tile back ends agree
+        bailout = self.bailout
+        extra = range(self.power - 1)
+        cx, cy = x, y
+        i = 0
+        while i < max_iter:
+            if x * x + y * y > bailout:
+                break
+            zx, zy = x, y
+            for _ in extra:
+                zx, zy = zx * x - zy * y, zx * y + zy * x
+            x, y = zx + cx, zy + cy
+            i += 1
+        return i
+
+    def __repr__(self):
+        return f"Multibrot(power={self.power})"
+
+class BurningShip(EscapeTimeFractal):
+    name = 'burning_ship'
+
+    def step(self, x, y, x2, y2, cx, cy):
+        return x2 - y2 + cx, 2 * abs(x * y) + cy
+
+    def iterations_at_point(self, x, y, max_iter):
+        bailout = self.bailout
+        cx, cy = x, y
+        i = 0
+        while i < max_iter:
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > bailout:
+                break
+            x, y = x2 - y2 + cx, 2 * abs(x * y) + cy
+            i += 1
+        return i
+
+class Tricorn(EscapeTimeFractal):
+    name = 'tricorn'
+
+    def step(self, x, y, x2, y2, cx, cy):
+        return x2 - y2 + cx, -2 * x * y + cy
+
+    def iterations_at_point(self, x, y, max_iter):
+        bailout = self.bailout
+        cx, cy = x, y
+        i = 0
+        while i < max_iter:
+            x2 = x * x
+            y2 = y * y
+            if x2 + y2 > bailout:
+                break
+            x, y = x2 - y2 + cx, -2 * x * y + cy
+            i += 1
+        return i
+
+MANDELBROT = Mandelbrot()
+
+FRACTALS = {cls.name: cls for cls in (Mandelbrot, Julia, Multibrot, BurningShip, Tricorn)}
+
+def make_fractal(name, c=None, power=None):
+    if name not in FRACTALS:
+        raise ValueError(f"Unknown fractal '{name}', expected one of: {', '.join(FRACTALS)}")
+    if name == 'julia' and c is not None:
+        return Julia(c)
+    if name == 'multibrot' and power is not None:
+        return Multibrot(power)
+    return FRACTALS[name]()
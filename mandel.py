@@ -5,30 +5,24 @@ import time
 import logging
 import psutil
 from tabulate import tabulate
+from fractals import FRACTALS, MANDELBROT, make_fractal
+from output import OutputStage, FORMATS, PNG_FILTERS, check_iterations_output
 
 def iteration_to_color(i, max_iter):
     gray = int(255 * i / max_iter)
     return (gray, gray, gray)
 
-def iterations_at_point(x, y, max_iter):
-    x0, y0 = x, y
-    iter = 0
-    while (x*x + y*y <= 4) and (iter < max_iter):
-        xt = x*x - y*y + x0
-        yt = 2*x*y + y0
-        x, y = xt, yt
-        iter += 1
-    return iter
-
 def compute_image(args):
-    img, xmin, xmax, ymin, ymax, max_iter, start_row, end_row, summary = args
+    # The fractal is an optional tenth element; 9-tuples render the Mandelbrot set
+    img, xmin, xmax, ymin, ymax, max_iter, start_row, end_row, summary, *rest = args
+    fractal = rest[0] if rest else MANDELBROT
     start = time.time()
     width, height = img.size
     for j in range(start_row, end_row):
         for i in range(width):
             x = xmin + i * (xmax - xmin) / width
             y = ymin + j * (ymax - ymin) / height
-            iters = iterations_at_point(x, y, max_iter)
+            iters = fractal.iterations_at_point(x, y, max_iter)
             color = iteration_to_color(iters, max_iter)
             img.putpixel((i, j), color)
     elapsed = time.time() - start
@@ -43,8 +37,16 @@ def main():
     parser.add_argument('-s', type=float, default=4, help='Scale')
     parser.add_argument('-W', type=int, default=800, help='Image width')
     parser.add_argument('-H', type=int, default=600, help='Image height')
-    parser.add_argument('-o', type=str, default='mandel.png', help='Output file')
+    parser.add_argument('-o', type=str, default='mandel.png', help=f"Output file ({', '.join(FORMATS)})")
+    parser.add_argument('-z', type=int, default=6, help='PNG compression level (0-9)')
+    parser.add_argument('--png-filter', choices=list(PNG_FILTERS), default=None, help="PNG scanline filter, applied at any size; by default Pillow's adaptive filter below 1 MP and sub above")
+    parser.add_argument('-q', type=int, default=90, help='WebP/JPEG quality')
+    parser.add_argument('-f', '--fractal', choices=list(FRACTALS), default='mandelbrot', help='Fractal kernel')
+    parser.add_argument('-c', type=complex, default=None, help='Julia parameter, e.g. -c=-0.8+0.156j')
+    parser.add_argument('-p', type=int, default=None, help='Multibrot power')
     args = parser.parse_args()
+    fractal = make_fractal(args.fractal, c=args.c, power=args.p)
+    output = OutputStage(compress_level=args.z, png_filter=args.png_filter, quality=args.q)
 
     logging.info('Program started.')
     img = Image.new('RGB', (args.W, args.H))
@@ -52,8 +54,10 @@ def main():
     start_time = time.time()
     error_occurred = False
     try:
-        compute_image((img, args.x - args.s, args.x + args.s, args.y - args.s, args.y + args.s, args.m, 0, args.H, summary))
-        img.save(args.o)
+        check_iterations_output(args.o, False)
+        compute_image((img, args.x - args.s, args.x + args.s, args.y - args.s, args.y + args.s, args.m, 0, args.H, summary, fractal))
+        encode_time = output.save(img, args.o)
+        summary.append({'Fractal': f'Encode {args.o}', 'Time (s)': f'{encode_time:.3f}', 'Status': 'Completed'})
         logging.info(f'Saved image to {args.o}')
     except Exception as e:
         error_occurred = True
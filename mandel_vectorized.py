@@ -0,0 +1,78 @@
+# mandel_vectorized.py
+# Vectorized tile pipeline for the threaded back ends.
+# NumPy ufuncs release the GIL while they loop over an array, so threads that
+# iterate whole tiles at once run in parallel instead of contending for the GIL.
+
+import sys
+import math
+import numpy as np
+from fractals import MANDELBROT
+
+# Free-threaded CPython (3.13t and later) reports whether the GIL is active
+GIL_DISABLED = hasattr(sys, '_is_gil_enabled') and not sys._is_gil_enabled()
+
+# Under the GIL, each ufunc call only releases it for the duration of its inner
+# loop, so tiles must be large enough for that loop to dominate. Without a GIL
+# there is no contention and single rows keep the producer/consumer queues streaming.
+MIN_TILE_PIXELS = 1 if GIL_DISABLED else 65536
+
+# Near the set's boundary the orbit amplifies rounding error, so the share of pixels whose
+# float32 count differs from float64 roughly doubles every FLOAT32_DOUBLING_ITER iterations.
+# Auto mode keeps float32 while the pixel spacing, in units of float32 epsilon times the
+# coordinate magnitude, is at least FLOAT32_HEADROOM * 2 ** (max_iter / FLOAT32_DOUBLING_ITER).
+# Fitted with bench_precision.py over wide views down to 1e-3 zooms at max_iter 16-128:
+# the largest headroom meeting 0.01% differing pixels is 2, and 4 leaves a 2x margin.
+# That means float32 up to max_iter ~48 on the full set, ~32 at 0.01 zooms.
+# The back ends still default to float64; auto and float32 are opt-in.
+FLOAT32_EPS = float(np.finfo(np.float32).eps)
+FLOAT32_HEADROOM = 4
+FLOAT32_DOUBLING_ITER = 4
+
+PRECISIONS = ('auto', 'float32', 'float64')
+
+def batch_rows(image_width, tile_pixels=None):
+    return max(1, (tile_pixels or MIN_TILE_PIXELS) // image_width)
+
+def select_dtype(xcenter, ycenter, scale, image_width, image_height, max_iter, precision='auto'):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of: {', '.join(PRECISIONS)}")
+    if precision != 'auto':
+        return np.dtype(precision)
+    # Pixel spacing as in compute_chunk: (xmax - xmin) / (image_width - 1)
+    spacing = 2 * scale / (max(image_width, image_height) - 1)
+    magnitude = max(abs(xcenter), abs(ycenter)) + scale
+    # Compared in log2 so deep max_iter cannot overflow the exponential
+    if math.log2(spacing / (FLOAT32_EPS * magnitude)) < math.log2(FLOAT32_HEADROOM) + max_iter / FLOAT32_DOUBLING_ITER:
+        return np.dtype(np.float64)
+    return np.dtype(np.float32)
+
+def tile_coordinates(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, dtype=np.float64):
+    xmin = xcenter - scale
+    xmax = xcenter + scale
+    ymin = ycenter - scale
+    ymax = ycenter + scale
+    # Same operation order as the scalar loops so float64 tiles agree bit for bit;
+    # the grid is always built in float64 and only then narrowed to the tile dtype
+    x = xmin + (xmax - xmin) * np.arange(image_width, dtype=np.float64) / (image_width - 1)
+    y = ymin + (ymax - ymin) * np.arange(start_row, end_row, dtype=np.float64) / (image_height - 1)
+    cx, cy = np.meshgrid(x.astype(dtype), y.astype(dtype))
+    return cx, cy
+
+def iterations_for_rows(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, fractal=MANDELBROT, dtype=np.float64):
+    cx, cy = tile_coordinates(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, dtype)
+    return fractal.iterations_on_tile(cx, cy, max_iter)
+
+def iteration_to_color_array(iters, max_iter):
+    # Vectorized counterpart of mandel.iteration_to_color
+    gray = (255 * iters // max_iter).astype(np.uint8)
+    return np.repeat(gray[..., np.newaxis], 3, axis=-1)
+
+def compute_tiles(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, color=iteration_to_color_array, fractal=MANDELBROT, precision='float64', tile_pixels=None):
+    # Yields (first_row, rgb_tile) pairs covering rows start_row..end_row-1,
+    # or raw iteration counts when color is None
+    dtype = select_dtype(xcenter, ycenter, scale, image_width, image_height, max_iter, precision)
+    step = batch_rows(image_width, tile_pixels)
+    for row in range(start_row, end_row, step):
+        last = min(row + step, end_row)
+        iters = iterations_for_rows(row, last, xcenter, ycenter, scale, image_width, image_height, max_iter, fractal, dtype)
+        yield row, iters if color is None else color(iters, max_iter)
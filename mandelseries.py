@@ -5,8 +5,13 @@ import threading
 import logging
 import psutil
 import time
+import numpy as np
 from PIL import Image
 from tabulate import tabulate
+from mandel_vectorized import compute_tiles
+from fractals import MANDELBROT
+from coloring import check_coloring, iteration_histogram, histogram_image
+from output import DEFAULT_OUTPUT, encode_row, check_iterations_output
 
 def iteration_to_color(i, max_iter):
     if i == max_iter:
@@ -14,17 +19,8 @@ def iteration_to_color(i, max_iter):
     hue = int(255 * i / max_iter)
     return (hue, hue, 255)
 
-def iterations_at_point(x, y, max_iter):
-    i = 0
-    cx, cy = x, y
-    while i < max_iter:
-        if x*x + y*y > 4.0:
-            break
-        x, y = x*x - y*y + cx, 2*x*y + cy
-        i += 1
-    return i
-
-def compute_chunk(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue):
+def compute_chunk(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal=MANDELBROT, histograms=None):
+    # With histograms, rows carry raw iteration counts and the chunk's partial histogram is shared
     xmin = xcenter - scale
     xmax = xcenter + scale
     ymin = ycenter - scale
@@ -35,19 +31,23 @@ def compute_chunk(start_row, end_row, xcenter, ycenter, scale, image_width, imag
         y = ymin + (ymax - ymin) * py / (image_height - 1)
         for px in range(image_width):
             x = xmin + (xmax - xmin) * px / (image_width - 1)
-            i = iterations_at_point(x, y, max_iter)
-            row.append(iteration_to_color(i, max_iter))
+            i = fractal.iterations_at_point(x, y, max_iter)
+            row.append(i if histograms is not None else iteration_to_color(i, max_iter))
         chunk_data.append((py, row))
+    if histograms is not None:
+        histograms.append(iteration_histogram([row for _, row in chunk_data], max_iter))
     queue.put(chunk_data)
 
-def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary):
+def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal=MANDELBROT, histograms=None):
     proc_start = time.time()
-    compute_chunk(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue)
+    compute_chunk(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal, histograms)
     proc_end = time.time()
     process_times.append((i, start_row, end_row, proc_end - proc_start))
     process_summary.append({'Process': i, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{proc_end - proc_start:.2f}"})
 
-def multiprocessing_mandelbrot(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, nproc):
+def multiprocessing_mandelbrot(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, nproc, fractal=MANDELBROT, coloring='linear', output=DEFAULT_OUTPUT):
+    check_coloring(coloring)
+    check_iterations_output(filename, coloring == 'histogram')
     img = Image.new("RGB", (image_width, image_height))
     queue = multiprocessing.Queue()
     rows_per_proc = image_height // nproc
@@ -55,64 +55,87 @@ def multiprocessing_mandelbrot(filename, xcenter, ycenter, scale, image_width, i
     manager = multiprocessing.Manager()
     process_times = manager.list()
     process_summary = manager.list()
+    histograms = manager.list() if coloring == 'histogram' else None
+    iterations = np.zeros((image_height, image_width), dtype=np.int32) if histograms is not None else None
     for i in range(nproc):
         start_row = i * rows_per_proc
         end_row = image_height if i == nproc - 1 else (i + 1) * rows_per_proc
-        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary))
+        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal, histograms))
         processes.append(p)
         logging.info(f"Process {i} started for rows {start_row} to {end_row}")
         p.start()
     for _ in range(nproc):
         chunk_data = queue.get()
         for py, row in chunk_data:
+            if histograms is not None:
+                iterations[py] = row
+                continue
             for px, color in enumerate(row):
                 img.putpixel((px, py), color)
     for p in processes:
         p.join()
-    img.save(filename)
+    if histograms is not None:
+        img = Image.fromarray(histogram_image(iterations, histograms, max_iter, iteration_to_color_array), "RGB")
+    encode_time = output.save(img, filename, iterations)
     logging.info(f"Saved {filename}")
-    return list(process_summary)
+    return list(process_summary) + [encode_row('Process', encode_time)]
 
-def compute_chunk_thread(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, result_list, img, semaphore):
-    xmin = xcenter - scale
-    xmax = xcenter + scale
-    ymin = ycenter - scale
-    ymax = ycenter + scale
-    chunk_data = []
-    for py in range(start_row, end_row):
-        row = []
-        y = ymin + (ymax - ymin) * py / (image_height - 1)
-        for px in range(image_width):
-            x = xmin + (xmax - xmin) * px / (image_width - 1)
-            i = iterations_at_point(x, y, max_iter)
-            row.append(iteration_to_color(i, max_iter))
-        chunk_data.append((py, row))
-    # Synchronize writing to the image buffer
-    semaphore.acquire()
-    try:
-        for py, row in chunk_data:
-            for px, color in enumerate(row):
-                img.putpixel((px, py), color)
-    finally:
-        semaphore.release()
-    result_list.append(chunk_data)
+def iteration_to_color_array(iters, max_iter):
+    # Vectorized counterpart of iteration_to_color
+    hue = (255 * iters // max_iter).astype(np.uint8)
+    rgb = np.empty(iters.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = hue
+    rgb[..., 1] = hue
+    rgb[..., 2] = 255
+    rgb[iters == max_iter] = 0
+    return rgb
 
-def multithreading_mandelbrot(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, nthreads):
-    img = Image.new("RGB", (image_width, image_height))
+def compute_chunk_thread(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, result_list, pixels, semaphore, fractal=MANDELBROT, precision='float64', histograms=None, tile_pixels=None, summary_list=None, thread_id=0):
+    # NumPy tiles release the GIL while iterating, so threads compute concurrently.
+    # pixels holds raw iteration counts, colored once the threads are done; with
+    # histograms the partial histogram is shared too
+    chunk_start = time.time()
+    histogram = 0
+    for row, tile in compute_tiles(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, None, fractal, precision, tile_pixels):
+        if histograms is not None:
+            histogram = histogram + iteration_histogram(tile, max_iter)
+        # Synchronize writing to the image buffer
+        semaphore.acquire()
+        try:
+            pixels[row:row + len(tile)] = tile
+        finally:
+            semaphore.release()
+        result_list.append((row, len(tile)))
+    if histograms is not None:
+        histograms.append(histogram)
+    if summary_list is not None:
+        summary_list.append({'Thread': thread_id, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{time.time() - chunk_start:.2f}"})
+
+def multithreading_mandelbrot(filename, xcenter, ycenter, scale, image_width, image_height, max_iter, nthreads, fractal=MANDELBROT, precision='float64', coloring='linear', output=DEFAULT_OUTPUT, tile_pixels=None):
+    check_coloring(coloring)
+    histograms = [] if coloring == 'histogram' else None
+    iterations = np.zeros((image_height, image_width), dtype=np.int32)
     rows_per_thread = image_height // nthreads
     threads = []
     results = []
+    summary_list = []
     semaphore = threading.Semaphore(1)
     for i in range(nthreads):
         start_row = i * rows_per_thread
         end_row = image_height if i == nthreads - 1 else (i + 1) * rows_per_thread
-        t = threading.Thread(target=compute_chunk_thread, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, results, img, semaphore))
+        t = threading.Thread(target=compute_chunk_thread, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, results, iterations, semaphore, fractal, precision, histograms, tile_pixels, summary_list, i))
         threads.append(t)
         t.start()
     for t in threads:
         t.join()
-    img.save(filename)
+    if histograms is not None:
+        pixels = histogram_image(iterations, histograms, max_iter, iteration_to_color_array)
+    else:
+        pixels = iteration_to_color_array(iterations, max_iter)
+    img = Image.fromarray(pixels, "RGB")
+    encode_time = output.save(img, filename, iterations)
     print(f"Saved {filename}")
+    return sorted(summary_list, key=lambda row: row['Thread']) + [encode_row('Thread', encode_time)]
 
 def main():
     if len(sys.argv) <= 2:
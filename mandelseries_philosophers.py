@@ -4,8 +4,13 @@
 import threading
 import multiprocessing
 from queue import Queue
+import numpy as np
 from PIL import Image
-from mandel import iterations_at_point, iteration_to_color
+from mandel import iteration_to_color
+from fractals import MANDELBROT
+from output import DEFAULT_OUTPUT, encode_row, check_iterations_output
+from mandel_vectorized import iteration_to_color_array
+from coloring import check_coloring, iteration_histogram, histogram_image
 import time
 import logging
 import psutil
@@ -13,8 +18,10 @@ from tabulate import tabulate
 
 # Dining Philosophers synchronization using threading.Lock for forks
 
-def philosopher_worker(philosopher_id, left_fork, right_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list):
+def philosopher_worker(philosopher_id, left_fork, right_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list, fractal=MANDELBROT, histograms=None):
+    # With histograms, rows carry raw iteration counts and the partial histogram is shared
     chunk_start = time.time()
+    histogram = 0
     for py in range(start_row, end_row):
         # Philosopher tries to pick up left and right forks (locks)
         with left_fork:
@@ -23,11 +30,15 @@ def philosopher_worker(philosopher_id, left_fork, right_fork, start_row, end_row
                 row = []
                 for px in range(image_width):
                     x = xcenter - scale + (2 * scale) * px / (image_width - 1)
-                    i = iterations_at_point(x, y, max_iter)
-                    row.append(iteration_to_color(i, max_iter))
+                    i = fractal.iterations_at_point(x, y, max_iter)
+                    row.append(i if histograms is not None else iteration_to_color(i, max_iter))
+                if histograms is not None:
+                    histogram = histogram + iteration_histogram(row, max_iter)
                 queue.put((py, row))
     chunk_end = time.time()
     summary_list.append({'Philosopher': philosopher_id, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{chunk_end - chunk_start:.2f}"})
+    if histograms is not None:
+        histograms.append(histogram)
     queue.put(None)
 
 # Consumer function (unchanged)
@@ -42,7 +53,20 @@ def write_image_consumer(img, queue, num_philosophers):
         for px, color in enumerate(row):
             img.putpixel((px, py), color)
 
-def mandelbrot_philosophers_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_philosophers, filename):
+def write_iterations_consumer(iterations, queue, num_philosophers):
+    finished = 0
+    while finished < num_philosophers:
+        item = queue.get()
+        if item is None:
+            finished += 1
+            continue
+        py, row = item
+        iterations[py] = row
+
+def mandelbrot_philosophers_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_philosophers, filename, fractal=MANDELBROT, output=DEFAULT_OUTPUT, coloring='linear'):
+    check_coloring(coloring)
+    check_iterations_output(filename, coloring == 'histogram')
+    histograms = [] if coloring == 'histogram' else None
     img = Image.new('RGB', (image_width, image_height))
     queue = Queue()
     philosophers = []
@@ -56,18 +80,25 @@ def mandelbrot_philosophers_sync(xcenter, ycenter, scale, image_width, image_hei
         right_fork = forks[(i + 1) % num_philosophers]
         # To avoid deadlock, last philosopher picks up right fork first
         if i == num_philosophers - 1:
-            t = threading.Thread(target=philosopher_worker, args=(i, right_fork, left_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list))
+            t = threading.Thread(target=philosopher_worker, args=(i, right_fork, left_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list, fractal, histograms))
         else:
-            t = threading.Thread(target=philosopher_worker, args=(i, left_fork, right_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list))
+            t = threading.Thread(target=philosopher_worker, args=(i, left_fork, right_fork, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, summary_list, fractal, histograms))
         philosophers.append(t)
         t.start()
-    consumer = threading.Thread(target=write_image_consumer, args=(img, queue, num_philosophers))
+    iterations = None
+    if histograms is None:
+        consumer = threading.Thread(target=write_image_consumer, args=(img, queue, num_philosophers))
+    else:
+        iterations = np.zeros((image_height, image_width), dtype=np.int32)
+        consumer = threading.Thread(target=write_iterations_consumer, args=(iterations, queue, num_philosophers))
     consumer.start()
     for t in philosophers:
         t.join()
     consumer.join()
-    img.save(filename)
-    return summary_list
+    if histograms is not None:
+        img = Image.fromarray(histogram_image(iterations, histograms, max_iter, iteration_to_color_array), 'RGB')
+    encode_time = output.save(img, filename, iterations)
+    return summary_list + [encode_row('Philosopher', encode_time)]
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
@@ -4,8 +4,13 @@
 import threading
 import multiprocessing
 from queue import Queue
+import numpy as np
 from PIL import Image
-from mandel import iterations_at_point, iteration_to_color
+from mandel import iteration_to_color
+from mandel_vectorized import compute_tiles, iteration_to_color_array
+from fractals import MANDELBROT
+from output import DEFAULT_OUTPUT, encode_row, check_iterations_output
+from coloring import check_coloring, iteration_histogram, histogram_image
 import time
 import logging
 import psutil
@@ -34,18 +39,24 @@ class SleepingBarberQueue:
             self.not_full.notify()
             return item
 
-def compute_chunk_sleeping_barber(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, sb_queue, summary_list, thread_id):
+def compute_chunk_sleeping_barber(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, sb_queue, summary_list, thread_id, fractal=MANDELBROT, histograms=None):
+    # With histograms, rows carry raw iteration counts and the partial histogram is shared
     chunk_start = time.time()
+    histogram = 0
     for py in range(start_row, end_row):
         y = ycenter - scale + (2 * scale) * py / (image_height - 1)
         row = []
         for px in range(image_width):
             x = xcenter - scale + (2 * scale) * px / (image_width - 1)
-            i = iterations_at_point(x, y, max_iter)
-            row.append(iteration_to_color(i, max_iter))
+            i = fractal.iterations_at_point(x, y, max_iter)
+            row.append(i if histograms is not None else iteration_to_color(i, max_iter))
+        if histograms is not None:
+            histogram = histogram + iteration_histogram(row, max_iter)
         sb_queue.put((py, row))
     chunk_end = time.time()
     summary_list.append({'Thread': thread_id, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{chunk_end - chunk_start:.2f}"})
+    if histograms is not None:
+        histograms.append(histogram)
     sb_queue.put(None)
 
 def write_image_sleeping_barber(img, sb_queue, num_producers):
@@ -59,8 +70,46 @@ def write_image_sleeping_barber(img, sb_queue, num_producers):
         for px, color in enumerate(row):
             img.putpixel((px, py), color)
 
-def mandelbrot_sleeping_barber_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_threads, filename):
-    img = Image.new('RGB', (image_width, image_height))
+def write_iterations_sleeping_barber(iterations, sb_queue, num_producers):
+    finished = 0
+    while finished < num_producers:
+        item = sb_queue.get()
+        if item is None:
+            finished += 1
+            continue
+        py, row = item
+        iterations[py] = row
+
+# Thread-side customers and barber work on NumPy tiles, which release the GIL while iterating
+
+def compute_tiles_sleeping_barber(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, sb_queue, summary_list, thread_id, fractal=MANDELBROT, precision='float64', tile_pixels=None, histograms=None):
+    chunk_start = time.time()
+    histogram = 0
+    for row, tile in compute_tiles(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, None, fractal, precision, tile_pixels):
+        if histograms is not None:
+            histogram = histogram + iteration_histogram(tile, max_iter)
+        sb_queue.put((row, tile))
+    chunk_end = time.time()
+    summary_list.append({'Thread': thread_id, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{chunk_end - chunk_start:.2f}"})
+    if histograms is not None:
+        histograms.append(histogram)
+    sb_queue.put(None)
+
+def write_tiles_sleeping_barber(pixels, sb_queue, num_producers):
+    finished = 0
+    while finished < num_producers:
+        item = sb_queue.get()
+        if item is None:
+            finished += 1
+            continue
+        row, tile = item
+        pixels[row:row + len(tile)] = tile
+
+def mandelbrot_sleeping_barber_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_threads, filename, fractal=MANDELBROT, precision='float64', output=DEFAULT_OUTPUT, tile_pixels=None, coloring='linear'):
+    check_coloring(coloring)
+    histograms = [] if coloring == 'histogram' else None
+    # Tiles carry raw iteration counts, colored once the barber has written them all
+    iterations = np.zeros((image_height, image_width), dtype=np.int32)
     sb_queue = SleepingBarberQueue(maxsize=16)  # waiting room size
     threads = []
     rows_per_thread = image_height // num_threads
@@ -68,46 +117,61 @@ def mandelbrot_sleeping_barber_sync(xcenter, ycenter, scale, image_width, image_
     for i in range(num_threads):
         start_row = i * rows_per_thread
         end_row = (i + 1) * rows_per_thread if i < num_threads - 1 else image_height
-        t = threading.Thread(target=compute_chunk_sleeping_barber, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, sb_queue, summary_list, i))
+        t = threading.Thread(target=compute_tiles_sleeping_barber, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, sb_queue, summary_list, i, fractal, precision, tile_pixels, histograms))
         threads.append(t)
         t.start()
-    consumer = threading.Thread(target=write_image_sleeping_barber, args=(img, sb_queue, num_threads))
+    consumer = threading.Thread(target=write_tiles_sleeping_barber, args=(iterations, sb_queue, num_threads))
     consumer.start()
     for t in threads:
         t.join()
     consumer.join()
-    img.save(filename)
-    return summary_list
+    if histograms is not None:
+        pixels = histogram_image(iterations, histograms, max_iter, iteration_to_color_array)
+    else:
+        pixels = iteration_to_color_array(iterations, max_iter)
+    img = Image.fromarray(pixels, 'RGB')
+    encode_time = output.save(img, filename, iterations)
+    return summary_list + [encode_row('Thread', encode_time)]
 
-def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary):
+def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal=MANDELBROT, histograms=None):
     proc_start = time.time()
-    compute_chunk_sleeping_barber(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_summary, i)
+    compute_chunk_sleeping_barber(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_summary, i, fractal, histograms)
     proc_end = time.time()
     process_times.append((i, start_row, end_row, proc_end - proc_start))
     # process_summary is already appended in compute_chunk_sleeping_barber
 
-def mandelbrot_process_sleeping_barber_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_processes, filename):
+def mandelbrot_process_sleeping_barber_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_processes, filename, fractal=MANDELBROT, output=DEFAULT_OUTPUT, coloring='linear'):
+    check_coloring(coloring)
+    check_iterations_output(filename, coloring == 'histogram')
     img = Image.new('RGB', (image_width, image_height))
     queue = multiprocessing.Queue()
     processes = []
     rows_per_process = image_height // num_processes
     process_times = multiprocessing.Manager().list()
     process_summary = multiprocessing.Manager().list()
+    histograms = multiprocessing.Manager().list() if coloring == 'histogram' else None
     for i in range(num_processes):
         start_row = i * rows_per_process
         end_row = (i + 1) * rows_per_process if i < num_processes - 1 else image_height
-        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary))
+        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal, histograms))
         processes.append(p)
         logging.info(f"Process {i} started for rows {start_row} to {end_row}")
         p.start()
-    consumer = threading.Thread(target=write_image_sleeping_barber, args=(img, queue, num_processes))
+    iterations = None
+    if histograms is None:
+        consumer = threading.Thread(target=write_image_sleeping_barber, args=(img, queue, num_processes))
+    else:
+        iterations = np.zeros((image_height, image_width), dtype=np.int32)
+        consumer = threading.Thread(target=write_iterations_sleeping_barber, args=(iterations, queue, num_processes))
     consumer.start()
     for p in processes:
         p.join()
     consumer.join()
-    img.save(filename)
+    if histograms is not None:
+        img = Image.fromarray(histogram_image(iterations, histograms, max_iter, iteration_to_color_array), 'RGB')
+    encode_time = output.save(img, filename, iterations)
     logging.info(f"Saved {filename}")
-    return list(process_summary)
+    return list(process_summary) + [encode_row('Process', encode_time)]
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
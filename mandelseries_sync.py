@@ -4,46 +4,52 @@
 import threading
 import multiprocessing
 from queue import Queue
+import numpy as np
 from PIL import Image
-from mandel import iterations_at_point, iteration_to_color
+from mandel import iteration_to_color
+from mandel_vectorized import compute_tiles, iteration_to_color_array
+from fractals import MANDELBROT
+from coloring import check_coloring, iteration_histogram, histogram_image
+from output import DEFAULT_OUTPUT, encode_row, check_iterations_output
 import time
 import logging
 import psutil
 from tabulate import tabulate
 
-# Producer function for threading
-
-def compute_chunk_thread_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue):
-    xmin = xcenter - scale
-    xmax = xcenter + scale
-    ymin = ycenter - scale
-    ymax = ycenter + scale
-    for py in range(start_row, end_row):
-        y = ymin + (ymax - ymin) * py / (image_height - 1)
-        row = []
-        for px in range(image_width):
-            x = xmin + (xmax - xmin) * px / (image_width - 1)
-            i = iterations_at_point(x, y, max_iter)
-            row.append(iteration_to_color(i, max_iter))
-        queue.put((py, row))
+# Producer function for threading (NumPy tiles release the GIL while iterating)
+# Tiles carry raw iteration counts, colored once at the end; with histograms each
+# producer also shares its partial histogram
+
+def compute_chunk_thread_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal=MANDELBROT, precision='float64', histograms=None, tile_pixels=None, summary_list=None, thread_id=0):
+    chunk_start = time.time()
+    histogram = 0
+    tiles = compute_tiles(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, color=None, fractal=fractal, precision=precision, tile_pixels=tile_pixels)
+    for row, tile in tiles:
+        if histograms is not None:
+            histogram = histogram + iteration_histogram(tile, max_iter)
+        queue.put((row, tile))
+    if histograms is not None:
+        histograms.append(histogram)
+    if summary_list is not None:
+        summary_list.append({'Thread': thread_id, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{time.time() - chunk_start:.2f}"})
     queue.put(None)  # Signal end of production
 
 # Consumer function for threading
 
-def write_image_thread_consumer(img, queue, num_producers):
+def write_image_thread_consumer(pixels, queue, num_producers):
     finished = 0
     while finished < num_producers:
         item = queue.get()
         if item is None:
             finished += 1
             continue
-        py, row = item
-        for px, color in enumerate(row):
-            img.putpixel((px, py), color)
+        row, tile = item
+        pixels[row:row + len(tile)] = tile
 
 # Producer function for multiprocessing
 
-def compute_chunk_process_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue):
+def compute_chunk_process_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal=MANDELBROT, histograms=None):
+    histogram = 0
     xmin = xcenter - scale
     xmax = xcenter + scale
     ymin = ycenter - scale
@@ -53,9 +59,13 @@ def compute_chunk_process_producer(start_row, end_row, xcenter, ycenter, scale,
         row = []
         for px in range(image_width):
             x = xmin + (xmax - xmin) * px / (image_width - 1)
-            i = iterations_at_point(x, y, max_iter)
-            row.append(iteration_to_color(i, max_iter))
+            i = fractal.iterations_at_point(x, y, max_iter)
+            row.append(i if histograms is not None else iteration_to_color(i, max_iter))
+        if histograms is not None:
+            histogram = histogram + iteration_histogram(row, max_iter)
         queue.put((py, row))
+    if histograms is not None:
+        histograms.append(histogram)
     queue.put(None)
 
 # Consumer function for multiprocessing
@@ -71,58 +81,87 @@ def write_image_process_consumer(img, queue, num_producers):
         for px, color in enumerate(row):
             img.putpixel((px, py), color)
 
+def write_iterations_process_consumer(iterations, queue, num_producers):
+    finished = 0
+    while finished < num_producers:
+        item = queue.get()
+        if item is None:
+            finished += 1
+            continue
+        py, row = item
+        iterations[py] = row
+
 # Example usage for threading
 
-def mandelbrot_threaded_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_threads, filename):
-    img = Image.new('RGB', (image_width, image_height))
+def mandelbrot_threaded_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_threads, filename, fractal=MANDELBROT, precision='float64', coloring='linear', output=DEFAULT_OUTPUT, tile_pixels=None):
+    check_coloring(coloring)
+    histograms = [] if coloring == 'histogram' else None
+    iterations = np.zeros((image_height, image_width), dtype=np.int32)
     queue = Queue()
     threads = []
+    summary_list = []
     rows_per_thread = image_height // num_threads
     for i in range(num_threads):
         start_row = i * rows_per_thread
         end_row = (i + 1) * rows_per_thread if i < num_threads - 1 else image_height
-        t = threading.Thread(target=compute_chunk_thread_producer, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue))
+        t = threading.Thread(target=compute_chunk_thread_producer, args=(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal, precision, histograms, tile_pixels, summary_list, i))
         threads.append(t)
         t.start()
-    consumer = threading.Thread(target=write_image_thread_consumer, args=(img, queue, num_threads))
+    consumer = threading.Thread(target=write_image_thread_consumer, args=(iterations, queue, num_threads))
     consumer.start()
     for t in threads:
         t.join()
     consumer.join()
-    img.save(filename)
+    if histograms is not None:
+        pixels = histogram_image(iterations, histograms, max_iter, iteration_to_color_array)
+    else:
+        pixels = iteration_to_color_array(iterations, max_iter)
+    img = Image.fromarray(pixels, 'RGB')
+    encode_time = output.save(img, filename, iterations)
     print(f"Saved {filename}")
+    return sorted(summary_list, key=lambda row: row['Thread']) + [encode_row('Thread', encode_time)]
 
 # Example usage for multiprocessing
 
-def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary):
+def process_wrapper(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal=MANDELBROT, histograms=None):
     proc_start = time.time()
-    compute_chunk_process_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue)
+    compute_chunk_process_producer(start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, fractal, histograms)
     proc_end = time.time()
     process_times.append((i, start_row, end_row, proc_end - proc_start))
     process_summary.append({'Process': i, 'Start Row': start_row, 'End Row': end_row, 'Time (s)': f"{proc_end - proc_start:.2f}"})
 
-def mandelbrot_process_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_processes, filename):
+def mandelbrot_process_sync(xcenter, ycenter, scale, image_width, image_height, max_iter, num_processes, filename, fractal=MANDELBROT, coloring='linear', output=DEFAULT_OUTPUT):
+    check_coloring(coloring)
+    check_iterations_output(filename, coloring == 'histogram')
     img = Image.new('RGB', (image_width, image_height))
     queue = multiprocessing.Queue()
     processes = []
     rows_per_process = image_height // num_processes
     process_times = multiprocessing.Manager().list()
     process_summary = multiprocessing.Manager().list()
+    histograms = multiprocessing.Manager().list() if coloring == 'histogram' else None
     for i in range(num_processes):
         start_row = i * rows_per_process
         end_row = (i + 1) * rows_per_process if i < num_processes - 1 else image_height
-        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary))
+        p = multiprocessing.Process(target=process_wrapper, args=(i, start_row, end_row, xcenter, ycenter, scale, image_width, image_height, max_iter, queue, process_times, process_summary, fractal, histograms))
         processes.append(p)
         logging.info(f"Process {i} started for rows {start_row} to {end_row}")
         p.start()
-    consumer = threading.Thread(target=write_image_process_consumer, args=(img, queue, num_processes))
+    iterations = None
+    if histograms is None:
+        consumer = threading.Thread(target=write_image_process_consumer, args=(img, queue, num_processes))
+    else:
+        iterations = np.zeros((image_height, image_width), dtype=np.int32)
+        consumer = threading.Thread(target=write_iterations_process_consumer, args=(iterations, queue, num_processes))
     consumer.start()
     for p in processes:
         p.join()
     consumer.join()
-    img.save(filename)
+    if histograms is not None:
+        img = Image.fromarray(histogram_image(iterations, histograms, max_iter, iteration_to_color_array), 'RGB')
+    encode_time = output.save(img, filename, iterations)
     logging.info(f"Saved {filename}")
-    return list(process_summary)
+    return list(process_summary) + [encode_row('Process', encode_time)]
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
@@ -0,0 +1,115 @@
+# output.py
+# Output stage: encodes a finished image and reports how long encoding took,
+# separately from the compute time of the back end that produced it.
+# Large PNGs are split into row strips that are deflated in parallel threads
+# (zlib releases the GIL while compressing) and stitched into one zlib stream.
+# Back ends append the encode time to their summaries as an 'Encode' row.
+
+import os
+import struct
+import time
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from bitmap_api import Bitmap, save_bitmap_as_bmp
+
+FORMATS = {'.png': 'png', '.bmp': 'bmp', '.npy': 'npy', '.webp': 'webp', '.jpg': 'jpeg', '.jpeg': 'jpeg'}
+
+# PNG scanline filters the strip encoder can apply, with their filter type byte
+PNG_FILTERS = {'none': 0, 'sub': 1, 'up': 2}
+
+def check_iterations_output(filename, keeps_iterations):
+    # .npy holds raw iteration counts, so it needs a back end (or coloring) that keeps them
+    if FORMATS.get(os.path.splitext(filename)[1].lower()) == 'npy' and not keeps_iterations:
+        raise ValueError(f"Cannot save {filename}: this back end keeps no iteration counts (use a tiled back end or coloring='histogram')")
+
+def png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def filter_scanlines(pixels, png_filter):
+    rows = pixels.reshape(pixels.shape[0], -1)
+    filtered = np.empty((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    filtered[:, 0] = PNG_FILTERS[png_filter]
+    data = filtered[:, 1:]
+    if png_filter == 'sub':
+        # Each byte minus the same channel of the pixel to its left, modulo 256
+        data[:, :3] = rows[:, :3]
+        np.subtract(rows[:, 3:], rows[:, :-3], out=data[:, 3:])
+    elif png_filter == 'up':
+        data[0] = rows[0]
+        np.subtract(rows[1:], rows[:-1], out=data[1:])
+    else:
+        data[:] = rows
+    return filtered
+
+def deflate_strip(data, compress_level, last):
+    # Raw deflate; non-final strips end on a byte-aligned sync flush so strips concatenate
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+def encode_png_parallel(pixels, compress_level=6, png_filter='sub', strip_rows=128, workers=None):
+    height, width = pixels.shape[:2]
+    filtered = filter_scanlines(pixels, png_filter)
+    strips = [filtered[row:row + strip_rows].tobytes() for row in range(0, height, strip_rows)]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        deflated = list(pool.map(deflate_strip, strips, [compress_level] * len(strips), [k == len(strips) - 1 for k in range(len(strips))]))
+    adler = 1
+    for strip in strips:
+        adler = zlib.adler32(strip, adler)
+    stream = b'\x78\x9c' + b''.join(deflated) + struct.pack('>I', adler)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)  # 8-bit RGB, no interlace
+    return b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header) + png_chunk(b'IDAT', stream) + png_chunk(b'IEND', b'')
+
+def image_to_bitmap(pixels):
+    height, width = pixels.shape[:2]
+    bitmap = Bitmap(width, height)
+    rgba = (255 << 24) | (pixels[..., 0].astype(np.uint32) << 16) | (pixels[..., 1].astype(np.uint32) << 8) | pixels[..., 2]
+    bitmap.data = rgba.ravel().tolist()
+    return bitmap
+
+class OutputStage:
+    def __init__(self, compress_level=6, png_filter=None, quality=90, strip_rows=128, parallel_min_pixels=1 << 20, workers=None):
+        # Without png_filter, small PNGs use Pillow's adaptive filtering and large ones 'sub' strips;
+        # an explicit filter sends every PNG through the strip encoder so it always applies
+        if png_filter is not None and png_filter not in PNG_FILTERS:
+            raise ValueError(f"Unknown PNG filter '{png_filter}', expected one of: {', '.join(PNG_FILTERS)}")
+        self.compress_level = compress_level
+        self.png_filter = png_filter
+        self.quality = quality
+        self.strip_rows = strip_rows
+        # Below this size Pillow's single-threaded encoder finishes before threads pay off
+        self.parallel_min_pixels = parallel_min_pixels
+        self.workers = workers
+
+    def save(self, img, filename, iterations=None):
+        # Returns the encode time in seconds
+        ext = os.path.splitext(filename)[1].lower()
+        fmt = FORMATS.get(ext, ext)
+        check_iterations_output(filename, iterations is not None)
+        start = time.time()
+        if fmt == 'npy':
+            np.save(filename, iterations)
+        elif fmt == 'bmp':
+            save_bitmap_as_bmp(image_to_bitmap(np.asarray(img.convert('RGB'))), filename)
+        elif fmt == 'png' and (self.png_filter is not None or img.width * img.height >= self.parallel_min_pixels):
+            with open(filename, 'wb') as f:
+                f.write(encode_png_parallel(np.asarray(img.convert('RGB')), self.compress_level, self.png_filter or 'sub', self.strip_rows, self.workers))
+        elif fmt == 'png':
+            img.save(filename, compress_level=self.compress_level)
+        elif fmt in ('webp', 'jpeg'):
+            img.save(filename, quality=self.quality)
+        else:
+            # Anything else goes to Pillow, which picks the format from the extension
+            img.save(filename)
+        elapsed = time.time() - start
+        logging.info(f"Encoded {filename} ({fmt}) in {elapsed:.3f} seconds")
+        return elapsed
+
+DEFAULT_OUTPUT = OutputStage()
+
+def encode_row(key, elapsed):
+    return {key: 'Encode', 'Time (s)': f"{elapsed:.3f}"}
+
+def encode_time(summary):
+    return sum(float(row['Time (s)']) for row in summary if 'Encode' in row.values())